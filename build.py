@@ -3,10 +3,21 @@ import os
 import re
 import json
 import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from html import unescape
+from typing import Iterator
+from urllib.parse import quote, unquote
+from html import escape, unescape
 from bs4 import BeautifulSoup  # type: ignore
 
+try:
+    import orjson  # type: ignore  # optional: faster JSON encoding for the search index
+except ImportError:
+    orjson = None
+
 
 ROOT = Path(__file__).parent
 SRC_DIRS = [
@@ -24,46 +35,136 @@ ERROR_TITLE_PATTERNS = [
     re.compile(r"Error code\s*5\d\d", re.I),
     re.compile(r"Erreur\s*404|404\s*Not\s*Found|Free Pages Personnelles", re.I),
 ]
+# All error signatures fused into one alternation so a title is scanned once
+ERROR_TITLE_RE = re.compile("|".join(f"(?:{pat.pattern})" for pat in ERROR_TITLE_PATTERNS), re.I)
+CLOUDFLARE_RAY_RE = re.compile(r"Cloudflare Ray ID", re.I)
+
+# Curated taxonomy rules (title-based regex mapping)
+CURATED_TAXONOMY: list[tuple[re.Pattern[str], str]] = [
+    # Map gear-like titles to Equipment (aligns with original wiki wording)
+    (re.compile(r"\b(Armor|Armors|Cloth|Leather|Plate|Shield|Shields|Jewelry|Equipment Set)s?\b", re.I), "Equipment"),
+    (re.compile(r"\b(Claws|Crossbows|Dual Swords|Knuckles|Launcher|Staves|Two Handed|One Handed|Wands)\b", re.I), "Weapons"),
+    (re.compile(r"\b(Quest|Quest:|Quests)\b", re.I), "Quests"),
+    (re.compile(r"\b(Monster|Monsters|MOB|Drop|Mob item drops)\b", re.I), "Monsters"),
+    (re.compile(r"\b(Skill|Skills|DNA)\b", re.I), "Skills"),
+    (re.compile(r"\b(Stat|Stats|EXP|EXP Chart|Level|Levels|Leveling|Leveling Spots)\b", re.I), "Character"),
+    (re.compile(r"\b(World|Map|World Map|Place|Places|Dungeon|Dungeons)\b", re.I), "World"),
+    (re.compile(r"\b(Client|Patch|Patches|Downloads?)\b", re.I), "Downloads"),
+    (re.compile(r"\b(Xeons|Waters|Consumables?|Potion|Potions|Elixir|Elixirs)\b", re.I), "Consumables"),
+    (re.compile(r"\b(Build|Builds|Guide|Guides?)\b", re.I), "Guides"),
+    (re.compile(r"\b(Class|Rogue|Warrior|Shaman|Mystic|Templar|Radiant|Assassin|Avenger|Berserker|Commander|Defender|Defiler|Dominator|Druid|Elementalist|Forsaker|Protector|Shadow Runner|Soul Hunter)\b", re.I), "Classes"),
+]
+# Fused form of CURATED_TAXONOMY: named group G<i> matches rule i, so one finditer classifies a title
+CURATED_TAXONOMY_RE = re.compile(
+    "|".join(f"(?P<G{i}>{pat.pattern})" for i, (pat, _) in enumerate(CURATED_TAXONOMY)), re.I
+)
+CURATED_GROUP_TO_CAT = [cat for _, cat in CURATED_TAXONOMY]
 
 
 def is_error_page(soup: BeautifulSoup) -> bool:
     title = soup.find("title")
     title_text = title.get_text(strip=True) if title else ""
-    for pat in ERROR_TITLE_PATTERNS:
-        if pat.search(title_text or ""):
-            return True
+    if ERROR_TITLE_RE.search(title_text or ""):
+        return True
     # Cloudflare block signature
-    if soup.find(id="cf-wrapper") or soup.find(string=re.compile(r"Cloudflare Ray ID", re.I)):
+    if soup.find(id="cf-wrapper") or soup.find(string=CLOUDFLARE_RAY_RE):
         return True
     return False
 
 
+# Byte signatures checked on the raw file before parsing (substring search, no decode).
+# Title signatures only count inside <title>, as in ERROR_TITLE_PATTERNS; the Cloudflare ones anywhere.
+ERROR_TITLE_SIGNATURES = (b"Web server is down", b"Free Pages Personnelles")
+ERROR_PAGE_SIGNATURES = (b"Cloudflare Ray ID", b'id="cf-wrapper"')
+# A category page carries one of these (body class ns-14 or a "Category:" heading); absence rules it out
+CATEGORY_PAGE_HINTS = (b"ns-14", b">Category:")
+
+
+def looks_like_error_page(raw: bytes) -> bool:
+    start = raw.find(b"<title")
+    if start != -1:
+        end = raw.find(b"</title>", start)
+        title = raw[start:end] if end != -1 else b""
+        if any(sig in title for sig in ERROR_TITLE_SIGNATURES):
+            return True
+    return any(sig in raw for sig in ERROR_PAGE_SIGNATURES)
+
+
+def may_be_category_page(raw: bytes) -> bool:
+    return any(hint in raw for hint in CATEGORY_PAGE_HINTS)
+
+
+# Link placeholders written by extract_article, delimited by private-use characters that are stripped
+# from article content: OPEN CLOSE stands for the asset prefix, OPEN <quoted title>|<quoted fallback href> CLOSE
+# for an article link
+LINK_OPEN, LINK_CLOSE = "\ue000", "\ue001"
+LINK_PLACEHOLDER_RE = re.compile("\ue000(?:([^|\ue001]*)\\|([^\ue001]*))?\ue001")
+
+
+def strip_link_delimiters(content, marked: list) -> None:
+    """Remove LINK_OPEN/LINK_CLOSE from text and attributes, except the hrefs extract_article marked."""
+    def clean(value: str) -> str:
+        return value.replace(LINK_OPEN, "").replace(LINK_CLOSE, "")
+
+    for s in content.find_all(string=lambda t: LINK_OPEN in t or LINK_CLOSE in t):
+        s.replace_with(type(s)(clean(s)))
+    marked_ids = {id(a) for a in marked}
+    for tag in [content, *content.find_all(True)]:
+        for key, value in tag.attrs.items():
+            if key == "href" and id(tag) in marked_ids:
+                continue
+            if isinstance(value, list):
+                tag[key] = [clean(v) for v in value]
+            elif isinstance(value, str):
+                tag[key] = clean(value)
+
+
 def extract_article(soup: BeautifulSoup) -> dict | None:
     # MediaWiki typical structure
-    content = soup.select_one("#content #bodyContent") or soup.select_one("#content") or soup.select_one("#bodyContent")
-    heading = soup.select_one("h1.firstHeading") or soup.find("h1")
+    wrap = soup.find(id="content")
+    content = (wrap.find(id="bodyContent") if wrap else None) or wrap or soup.find(id="bodyContent")
+    heading = soup.find("h1", class_="firstHeading") or soup.find("h1")
     if not content or not heading:
         return None
 
     # Remove non-article UI elements inside content
-    for sel in ["#jump-to-nav", ".printfooter", "#catlinks", ".toc"]:
-        for el in content.select(sel):
+    for attrs in ({"id": "jump-to-nav"}, {"class": "printfooter"}, {"id": "catlinks"}, {"class": "toc"}):
+        for el in content.find_all(attrs=attrs):
             el.decompose()
 
-    # Normalize links to local .html files
+    # Mark local links with placeholders; build() resolves them once every article URL is known
+    marked: list = []
     for a in content.find_all("a"):
         href = a.get("href")
         if not href:
             continue
         # Skip external links
-        if href.startswith("http://") or href.startswith("https://"):
+        if href.startswith("http://") or href.startswith("https://") or href.startswith("mailto:"):
             continue
         # Normalize same-folder wiki links
         if href.endswith(".html"):
-            a["href"] = os.path.basename(href)
+            href = os.path.basename(href)
+            a["href"] = href
+        # category links
+        title_attr = a.get("title") or ""
+        if title_attr.startswith("Category:") or href.startswith("Category_"):
+            cat_name = normalize_category_name(title_attr) if title_attr else normalize_category_name(href.replace("Category_", "").replace(".html", "").replace("_", " "))
+            a["href"] = f"{LINK_OPEN}{LINK_CLOSE}categories/{category_output_filename(cat_name)}"
+            marked.append(a)
+            continue
+        # article links: carry the guessed title, and the current href as fallback if it doesn't resolve
+        guess_title = title_attr if title_attr else href.replace(".html", "").replace("_", " ")
+        a["href"] = f"{LINK_OPEN}{quote(guess_title, safe='')}|{quote(href, safe='')}{LINK_CLOSE}"
+        marked.append(a)
 
     title = heading.get_text(strip=True)
-    article_html = str(content)
+    # decode() directly rather than str(); keep the default "minimal" formatter, since formatter=None
+    # would write escaped text such as "&lt;" back out as raw markup
+    article_html = content.decode()
+    # Every delimiter should come from a marked href; if the source itself contained one, strip those and re-serialize
+    if article_html.count(LINK_OPEN) != len(marked) or article_html.count(LINK_CLOSE) != len(marked):
+        strip_link_delimiters(content, marked)
+        article_html = content.decode()
     # Also extract plain text for search
     article_text = content.get_text(" ", strip=True)
     return {"title": title, "html": article_html, "text": article_text}
@@ -73,37 +174,161 @@ def is_category_page(soup: BeautifulSoup) -> bool:
     body = soup.find("body")
     if body and any(cls.startswith("ns-14") for cls in (body.get("class") or [])):
         return True
-    h1 = soup.select_one("h1.firstHeading")
+    h1 = soup.find("h1", class_="firstHeading")
     if h1 and h1.get_text(strip=True).startswith("Category:"):
         return True
     return False
 
 
 def normalize_category_name(name: str) -> str:
+    # Interned: the same category names are stored across many sets/dicts
     if name.startswith("Category:"):
-        return name.split(":", 1)[1].strip()
-    return name.strip()
+        return sys.intern(name.split(":", 1)[1].strip())
+    return sys.intern(name.strip())
+
+
+# Byte table for to_safe_name: keeps [A-Za-z0-9_-], maps every other byte to NUL
+_SAFE_NAME_TABLE = bytes(
+    b if (chr(b).isascii() and chr(b).isalnum()) or chr(b) in "_-" else 0 for b in range(256)
+)
 
 
 def to_safe_name(title: str) -> str:
-    return (re.sub(r"[^A-Za-z0-9_\-]+", "_", title).strip("_") or "page")
+    # Same result as re.sub(r"[^A-Za-z0-9_\-]+", "_", title): non-ASCII encodes to "?" (one byte per char),
+    # translate() marks disallowed bytes with NUL, and each run of NULs collapses to a single "_"
+    marked = title.encode("ascii", "replace").translate(_SAFE_NAME_TABLE)
+    return (b"_".join(filter(None, marked.split(b"\0"))).decode("ascii").strip("_") or "page")
 
 
+@lru_cache(maxsize=None)
 def category_output_filename(category_name: str) -> str:
+    # Memoized: the same category is linked from category pages, the tree, breadcrumbs and article bodies
     base = to_safe_name(f"Category_{category_name}")
     return f"{base}.html"
 
 
+def iter_html(root: str) -> Iterator[str]:
+    """Yield paths of all .html files under root (os.scandir walk; avoids per-entry Path objects).
+
+    Order matches Path.rglob: a directory's files first, then its subdirectories depth-first in scandir order,
+    which matters because the first file seen for a title wins.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        subdirs: list[str] = []
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(".html"):
+                        yield entry.path
+        except OSError:
+            continue
+        # LIFO stack: push in reverse so the first subdirectory is visited first
+        stack.extend(reversed(subdirs))
+
+
+def parse_one(path: str) -> dict | None:
+    """Parse one source file into an article dict (title, html, text, categories), or None to skip it."""
+    try:
+        with open(path, "rb") as fh:
+            raw = fh.read()
+    except Exception:
+        return None
+    # Reject obvious junk before paying for a parse
+    if looks_like_error_page(raw):
+        return None
+    soup = BeautifulSoup(raw, "lxml")
+    if is_error_page(soup):
+        return None
+    # Skip category namespace here; categories are handled in a separate pass
+    if may_be_category_page(raw) and is_category_page(soup):
+        return None
+    article = extract_article(soup)
+    if not article:
+        return None
+    # Categories: infer from footer catlinks if present in raw html
+    catlinks = soup.find(id="catlinks")
+    article["categories"] = [
+        normalize_category_name(catlink["title"])
+        for catlink in (catlinks.find_all("a", title=True) if catlinks else [])
+        if catlink["title"].startswith("Category:")
+    ]
+    return article
+
+
+def parse_category(path: str) -> tuple[str, list[str], list[str]] | None:
+    """Parse one Category_*.html file into (category name, subcategories, page titles), or None to skip it."""
+    try:
+        with open(path, "rb") as fh:
+            raw = fh.read()
+    except Exception:
+        return None
+    if looks_like_error_page(raw) or not may_be_category_page(raw):
+        return None
+    soup = BeautifulSoup(raw, "lxml")
+    if is_error_page(soup) or not is_category_page(soup):
+        return None
+    h1 = soup.find("h1", class_="firstHeading")
+    if not h1:
+        return None
+    raw_title = h1.get_text(strip=True)
+    cat_name = normalize_category_name(raw_title)
+
+    # Subcategories
+    subcats: list[str] = []
+    sub_wrap = soup.find(id="mw-subcategories")
+    if sub_wrap:
+        for a in sub_wrap.find_all("a", title=True):
+            if not a["title"].startswith("Category:"):
+                continue
+            sub_name = normalize_category_name(a["title"])
+            if sub_name:
+                subcats.append(sub_name)
+
+    # Pages in category
+    pages: list[str] = []
+    pages_wrap = soup.find(id="mw-pages")
+    if pages_wrap:
+        for a in pages_wrap.find_all("a", title=True):
+            page_title = a["title"]
+            if page_title:
+                pages.append(page_title)
+    return cat_name, subcats, pages
+
+
+# Page template split once into literal chunks (even indexes) and placeholder names (odd indexes)
+PAGE_TEMPLATE_PARTS = re.split(
+    rb"\{\{(TITLE|BODY|ASSET_PREFIX|BREADCRUMBS)\}\}", (ROOT / "templates" / "page.html").read_bytes()
+)
+
+
 def write_page(output_path: Path, title: str, body_html: str, *, asset_prefix: str = "", breadcrumbs_html: str = ""):
-    template = (ROOT / "templates" / "page.html").read_text(encoding="utf-8")
-    html = (
-        template
-        .replace("{{TITLE}}", unescape(title))
-        .replace("{{BODY}}", body_html)
-        .replace("{{ASSET_PREFIX}}", asset_prefix)
-        .replace("{{BREADCRUMBS}}", breadcrumbs_html or "")
-    )
-    output_path.write_text(html, encoding="utf-8")
+    values = {
+        b"TITLE": unescape(title).encode("utf-8"),
+        b"BODY": body_html.encode("utf-8"),
+        b"ASSET_PREFIX": asset_prefix.encode("utf-8"),
+        b"BREADCRUMBS": (breadcrumbs_html or "").encode("utf-8"),
+    }
+    chunks = [part if i % 2 == 0 else values[part] for i, part in enumerate(PAGE_TEMPLATE_PARTS)]
+    total = sum(len(c) for c in chunks)
+    # 0o666 so the umask applies, as with Path.write_text
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        # One gather-write syscall per page where available (POSIX); Windows has no writev
+        written = os.writev(fd, chunks) if hasattr(os, "writev") else 0
+        if written < total:
+            # Short (or no) gather write: finish with plain writes of whatever is left
+            rest = memoryview(b"".join(chunks))[written:]
+            while rest:
+                n = os.write(fd, rest)
+                if n <= 0:
+                    raise OSError(f"short write to {output_path}")
+                rest = rest[n:]
+    finally:
+        os.close(fd)
 
 
 def ensure_assets():
@@ -141,32 +366,27 @@ def build():
     CATEGORIES_DIR.mkdir(parents=True, exist_ok=True)
 
     search_index: list[dict] = []
-    a_to_z: dict[str, list[dict]] = {}
-    categories: dict[str, list[dict]] = {}
+    a_to_z: dict[str, list[tuple[str, str, str]]] = {}  # {letter: [(sort key, title, url), ...]}
+    categories: dict[str, set[str]] = {}  # {cat: {title, ...}}; urls resolved at render time
 
     # Process sources in priority order
     seen_titles: set[str] = set()
     article_title_to_filename: dict[str, str] = {}
     article_title_to_categories: dict[str, set[str]] = {}
-
-    for base in SRC_DIRS:
-        if not base.exists():
-            continue
-        for path in base.rglob("*.html"):
-            try:
-                html = path.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-            soup = BeautifulSoup(html, "html.parser")
-            if is_error_page(soup):
-                continue
-            # Skip category namespace here; categories are handled in a separate pass
-            if is_category_page(soup):
-                continue
-            article = extract_article(soup)
+    # Article pages are written once breadcrumbs are known: title -> (out_path, article_html, asset_prefix)
+    pending_pages: dict[str, tuple[Path, str, str]] = {}
+
+    # Parsing is CPU-bound and independent per file; fan it out and merge results here in source order.
+    # Category_*.html files are category-namespace pages, so only parse_category needs to see them.
+    paths = [p for base in SRC_DIRS if base.exists() for p in iter_html(str(base))]
+    cat_paths = [p for p in paths if os.path.basename(p).startswith("Category_")]
+    article_paths = [p for p in paths if not os.path.basename(p).startswith("Category_")]
+    with ProcessPoolExecutor() as ex:
+        for article in ex.map(parse_one, article_paths, chunksize=32):
             if not article:
                 continue
-            title = article["title"]
+            # Results cross a process boundary, so intern here rather than in the worker
+            title = sys.intern(article["title"])
             if not title or title in seen_titles:
                 continue
 
@@ -179,12 +399,12 @@ def build():
             out_dir = PAGES_DIR / first_char
             out_dir.mkdir(parents=True, exist_ok=True)
             out_path = out_dir / f"{safe_name}.html"
-            # breadcrumbs fill later once categories are known
             # compute asset prefix based on depth relative to SITE_DIR
             depth = len(out_path.relative_to(SITE_DIR).parts) - 1  # minus filename
             asset_prefix = "../" * depth
-            write_page(out_path, title, article["html"], asset_prefix=asset_prefix)  # type: ignore[arg-type]
-            url_rel = out_path.relative_to(SITE_DIR).as_posix()
+            # breadcrumbs fill later once categories are known
+            pending_pages[title] = (out_path, article["html"], asset_prefix)  # type: ignore[assignment]
+            url_rel = sys.intern(out_path.relative_to(SITE_DIR).as_posix())
             article_title_to_filename[title] = url_rel
 
             # Build search index entry
@@ -199,147 +419,116 @@ def build():
             if not first.isalpha():
                 first = "#"
             if not title.startswith("Category:"):
-                a_to_z.setdefault(first, []).append({"title": title, "url": url_rel})
+                a_to_z.setdefault(first, []).append((title.lower(), title, url_rel))
 
-            # Categories: infer from footer catlinks if present in raw html
-            for catlink in soup.select("#catlinks a[title^='Category:']"):
-                cat = normalize_category_name(catlink.get("title", catlink.get_text(strip=True)))
-                categories.setdefault(cat, []).append({"title": title, "url": url_rel})
+            for cat in map(sys.intern, article["categories"]):
+                categories.setdefault(cat, set()).add(title)
                 article_title_to_categories.setdefault(title, set()).add(cat)
 
-    # Pass 2: Parse category pages to build hierarchy (subcategories + pages)
-    category_graph: dict[str, dict[str, set[str]]] = {}
-    # {cat: {"subcats": set[str], "pages": set[str]}}
+        # Pass 2: Parse category pages to build hierarchy (subcategories + pages)
+        category_graph: dict[str, dict[str, set[str]]] = {}
+        # {cat: {"subcats": set[str], "pages": set[str]}}
 
-    for base in SRC_DIRS:
-        if not base.exists():
-            continue
-        for path in base.rglob("Category_*.html"):
-            try:
-                html = path.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
+        for parsed in ex.map(parse_category, cat_paths, chunksize=32):
+            if not parsed:
                 continue
-            soup = BeautifulSoup(html, "html.parser")
-            if is_error_page(soup) or not is_category_page(soup):
-                continue
-            h1 = soup.select_one("h1.firstHeading")
-            if not h1:
-                continue
-            raw_title = h1.get_text(strip=True)
-            cat_name = normalize_category_name(raw_title)
+            cat_name, subcats, pages = parsed
+            # Intern after unpickling so category names and titles share storage with pass 1
+            cat_name = sys.intern(cat_name)
+            subcats = [sys.intern(c) for c in subcats]
+            pages = [sys.intern(p) for p in pages]
             node = category_graph.setdefault(cat_name, {"subcats": set(), "pages": set()})
-
-            # Subcategories
-            sub_wrap = soup.select_one('#mw-subcategories')
-            if sub_wrap:
-                for a in sub_wrap.select('a[title^="Category:"]'):
-                    sub_name = normalize_category_name(a.get("title", a.get_text(strip=True)))
-                    if sub_name:
-                        node["subcats"].add(sub_name)
-                        # Ensure a node exists for subcategory so we generate a page even if its source HTML is missing
-                        category_graph.setdefault(sub_name, {"subcats": set(), "pages": set()})
-
-            # Pages in category
-            pages_wrap = soup.select_one('#mw-pages')
-            if pages_wrap:
-                for a in pages_wrap.select('a[title]'):
-                    page_title = a.get("title", a.get_text(strip=True))
-                    if page_title:
-                        node["pages"].add(page_title)
-
-    # Merge page-derived categories into graph
-    for cat_name, items in categories.items():
+            node["subcats"].update(subcats)
+            node["pages"].update(pages)
+            for sub_name in subcats:
+                # Ensure a node exists for subcategory so we generate a page even if its source HTML is missing
+                category_graph.setdefault(sub_name, {"subcats": set(), "pages": set()})
+
+    # Apply curated taxonomy to every article title (one scan of the fused pattern per title)
+    for title in article_title_to_filename:
+        cats_found = {CURATED_GROUP_TO_CAT[int(m.lastgroup[1:])] for m in CURATED_TAXONOMY_RE.finditer(title)}  # type: ignore[index]
+        for curated_cat in cats_found:
+            categories.setdefault(curated_cat, set()).add(title)
+            article_title_to_categories.setdefault(title, set()).add(curated_cat)
+
+    # Merge page-derived and curated categories into graph (single pass)
+    for cat_name, titles in categories.items():
         node = category_graph.setdefault(cat_name, {"subcats": set(), "pages": set()})
-        for it in items:
-            node["pages"].add(it["title"])  # type: ignore[index]
+        node["pages"].update(titles)
 
     # Sort listings
     for k in a_to_z:
-        a_to_z[k].sort(key=lambda x: x["title"].lower())
-    for k in categories:
-        categories[k].sort(key=lambda x: x["title"].lower())
-
-    # Write index files
-    (SITE_DIR / "search-index.json").write_text(json.dumps(search_index, ensure_ascii=False), encoding="utf-8")
+        a_to_z[k].sort(key=itemgetter(0))
+
+    # Write index files (encode once, reuse the bytes for both outputs)
+    if orjson is not None:
+        payload = orjson.dumps(search_index)
+    else:
+        # Compact separators so the output is byte-identical to orjson's
+        payload = json.dumps(search_index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    (SITE_DIR / "search-index.json").write_bytes(payload)
     # Also emit JS wrapper for file:// usage
-    (SITE_DIR / "search-index.js").write_text("window.SEARCH_INDEX=" + json.dumps(search_index, ensure_ascii=False) + ";", encoding="utf-8")
+    (SITE_DIR / "search-index.js").write_bytes(b"window.SEARCH_INDEX=" + payload + b";")
 
     # A-Z page
     az_html_parts = ["<div class=\"az\">"]
     for letter in sorted(a_to_z.keys()):
         az_html_parts.append(f"<h2>{letter}</h2><ul>")
-        for item in a_to_z[letter]:
-            az_html_parts.append(f"<li><a href=\"{item['url']}\">{item['title']}</a></li>")
+        for _, title, url in a_to_z[letter]:
+            az_html_parts.append(f"<li><a href=\"{url}\">{title}</a></li>")
         az_html_parts.append("</ul>")
     az_html_parts.append("</div>")
     write_page(SITE_DIR / "A-Z.html", "A–Z Index", "".join(az_html_parts), asset_prefix="")
 
     # Generate per-category pages and hierarchical Categories index
     # Helper to resolve page title -> url if present
-    def resolve_page_url(title: str) -> str | None:
-        if title in article_title_to_filename:
-            return article_title_to_filename[title]
-        # Try underscore/space variants
-        alt = title.replace("_", " ") if "_" in title else title.replace(" ", "_")
-        return article_title_to_filename.get(alt)
-
-    # Curated taxonomy rules (title-based regex mapping)
-    curated_taxonomy: list[tuple[re.Pattern[str], str]] = [
-        # Map gear-like titles to Equipment (aligns with original wiki wording)
-        (re.compile(r"\b(Armor|Armors|Cloth|Leather|Plate|Shield|Shields|Jewelry|Equipment Set)s?\b", re.I), "Equipment"),
-        (re.compile(r"\b(Claws|Crossbows|Dual Swords|Knuckles|Launcher|Staves|Two Handed|One Handed|Wands)\b", re.I), "Weapons"),
-        (re.compile(r"\b(Quest|Quest:|Quests)\b", re.I), "Quests"),
-        (re.compile(r"\b(Monster|Monsters|MOB|Drop|Mob item drops)\b", re.I), "Monsters"),
-        (re.compile(r"\b(Skill|Skills|DNA)\b", re.I), "Skills"),
-        (re.compile(r"\b(Stat|Stats|EXP|EXP Chart|Level|Levels|Leveling|Leveling Spots)\b", re.I), "Character"),
-        (re.compile(r"\b(World|Map|World Map|Place|Places|Dungeon|Dungeons)\b", re.I), "World"),
-        (re.compile(r"\b(Client|Patch|Patches|Downloads?)\b", re.I), "Downloads"),
-        (re.compile(r"\b(Xeons|Waters|Consumables?|Potion|Potions|Elixir|Elixirs)\b", re.I), "Consumables"),
-        (re.compile(r"\b(Build|Builds|Guide|Guides?)\b", re.I), "Guides"),
-        (re.compile(r"\b(Class|Rogue|Warrior|Shaman|Mystic|Templar|Radiant|Assassin|Avenger|Berserker|Commander|Defender|Defiler|Dominator|Druid|Elementalist|Forsaker|Protector|Shadow Runner|Soul Hunter)\b", re.I), "Classes"),
-    ]
-
-    # Apply curated taxonomy to every article title
-    for title, url in list(article_title_to_filename.items()):
-        for pat, curated_cat in curated_taxonomy:
-            if pat.search(title):
-                categories.setdefault(curated_cat, []).append({"title": title, "url": url})
-                article_title_to_categories.setdefault(title, set()).add(curated_cat)
+    # Titles keyed case-insensitively with "_" folded to " ", so one lookup covers every spelling variant
+    normalized_title_to_url: dict[str, str] = {}
+    for t, u in article_title_to_filename.items():
+        normalized_title_to_url.setdefault(t.replace("_", " ").lower(), u)
 
-    # Merge newly added (curated) categories into the graph as page lists
-    for cat_name, items in categories.items():
-        node = category_graph.setdefault(cat_name, {"subcats": set(), "pages": set()})
-        for it in items:
-            node["pages"].add(it["title"])  # type: ignore[index]
+    def resolve_page_url(title: str) -> str | None:
+        if not title:
+            return None
+        return article_title_to_filename.get(title) or normalized_title_to_url.get(title.replace("_", " ").lower())
 
-    # Helper to render a category page body with correct link prefix for articles
-    def render_category_body(cat_name: str, node: dict[str, set[str]], page_link_prefix: str) -> str:
+    # Helper to render a category page body; category pages live only under categories/,
+    # so article links always need one "../" and each body is rendered exactly once
+    def render_category_body(cat_name: str, node: dict[str, set[str]]) -> str:
         body_parts: list[str] = []
         body_parts.append(f"<div class=\"category\"><h2>Category: {cat_name}</h2>")
         # Subcategories (relative to current file location)
         if node["subcats"]:
             body_parts.append("<h3>Subcategories</h3><ul>")
-            for sub in sorted(node["subcats"], key=lambda s: s.lower()):
+            for sub in sorted(node["subcats"], key=str.lower):
                 href = category_output_filename(sub)
                 body_parts.append(f"<li><a href=\"{href}\">{sub}</a></li>")
             body_parts.append("</ul>")
-        # Pages (article links may live at site root; add prefix when needed)
+        # Pages (articles live under site root; step out of categories/)
         if node["pages"]:
             body_parts.append("<h3>Pages</h3><ul>")
-            for p in sorted(node["pages"], key=lambda s: s.lower()):
+            emitted_urls: set[str] = set()
+            for p in sorted(node["pages"], key=str.lower):
                 url = resolve_page_url(p)
-                if url:
-                    body_parts.append(f"<li><a href=\"{page_link_prefix}{url}\">{p}</a></li>")
+                # Spelling variants ("Plate Armor" / "plate_armor") resolve to the same article; list it once
+                if url and url not in emitted_urls:
+                    emitted_urls.add(url)
+                    body_parts.append(f"<li><a href=\"../{url}\">{p}</a></li>")
             body_parts.append("</ul>")
         body_parts.append("</div>")
         return "".join(body_parts)
 
-    # Write individual category pages
-    for cat_name in sorted(category_graph.keys(), key=lambda s: s.lower()):
-        node = category_graph[cat_name]
+    written_cat_pages: set[str] = set()
+
+    def write_category(cat_name: str, node: dict[str, set[str]]) -> None:
         # Under categories/ (CSS uses ../, article links use ../). No root duplicates.
-        body_cats = render_category_body(cat_name, node, page_link_prefix="../")
+        body_cats = render_category_body(cat_name, node)
         write_page(CATEGORIES_DIR / category_output_filename(cat_name), f"Category: {cat_name}", body_cats, asset_prefix="../")
+        written_cat_pages.add(cat_name)
+
+    # Write individual category pages
+    for cat_name in sorted(category_graph.keys(), key=str.lower):
+        write_category(cat_name, category_graph[cat_name])
 
     # Determine top-level categories (not a subcategory of any other)
     all_cats = set(category_graph.keys())
@@ -356,26 +545,36 @@ def build():
     for c in curated_roots_order:
         category_graph.setdefault(c, {"subcats": set(), "pages": set()})
     curated_present = curated_roots_order[:]
-    # Ensure pages exist for curated categories (write/overwrite is fine)
+    # Ensure pages exist for curated categories not already written above
     for cat_name in curated_present:
-        node = category_graph.get(cat_name, {"subcats": set(), "pages": set()})
-        body_cats = render_category_body(cat_name, node, page_link_prefix="../")
-        write_page(CATEGORIES_DIR / category_output_filename(cat_name), f"Category: {cat_name}", body_cats, asset_prefix="../")
+        if cat_name in written_cat_pages:
+            continue
+        write_category(cat_name, category_graph[cat_name])
+
+    roots = sorted(roots_set, key=str.lower)
 
-    roots = sorted(list(roots_set), key=lambda s: s.lower())
-
-    # Render tree
-    def render_tree(cat: str) -> str:
-        node = category_graph.get(cat, {"subcats": set(), "pages": set()})
-        html_parts = [f"<li><a href=\"categories/{category_output_filename(cat)}\">{cat}</a>"]
-        children = sorted(node["subcats"], key=lambda s: s.lower())
-        if children:
-            html_parts.append("<ul>")
-            for sub in children:
-                html_parts.append(render_tree(sub))
-            html_parts.append("</ul>")
-        html_parts.append("</li>")
-        return "".join(html_parts)
+    # Render tree (children sorted once per category, not once per visit)
+    sorted_subcats: dict[str, list[str]] = {c: sorted(node["subcats"], key=str.lower) for c, node in category_graph.items()}
+
+    def render_tree(root: str, out: list[str]) -> None:
+        # Iterative DFS; stack holds (category, ancestors) to open or a closing-tag string to emit
+        stack: list[tuple[str, tuple[str, ...]] | str] = [(root, ())]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                out.append(item)
+                continue
+            cat, ancestors = item
+            out.append(f"<li><a href=\"categories/{category_output_filename(cat)}\">{cat}</a>")
+            # Skip children already on the path so category cycles terminate
+            children = [sub for sub in sorted_subcats.get(cat, ()) if sub != cat and sub not in ancestors]
+            if children:
+                out.append("<ul>")
+                stack.append("</ul></li>")
+                path = ancestors + (cat,)
+                stack.extend((sub, path) for sub in reversed(children))
+            else:
+                out.append("</li>")
 
     cat_index_parts = ["<div class=\"categories\">", "<p>Browse by category and subcategory.</p>"]
     if curated_present:
@@ -388,79 +587,33 @@ def build():
     if legacy:
         cat_index_parts.append("<details><summary>Legacy</summary><ul>")
         for r in legacy:
-            cat_index_parts.append(render_tree(r))
+            render_tree(r, cat_index_parts)
         cat_index_parts.append("</ul></details>")
     cat_index_parts.append("</div>")
     write_page(SITE_DIR / "Categories.html", "Categories", "".join(cat_index_parts), asset_prefix="")
 
     # After categories are finalized, add breadcrumbs to article pages
-    # Build case-insensitive title lookup
-    lower_title_to_url: dict[str, str] = {t.lower(): u for t, u in article_title_to_filename.items()}
-
-    def resolve_article_url_by_title_maybe(title_guess: str) -> str | None:
-        if not title_guess:
-            return None
-        # Direct
-        u = article_title_to_filename.get(title_guess)
-        if u:
-            return u
-        # Case-insensitive
-        u = lower_title_to_url.get(title_guess.lower())
-        if u:
-            return u
-        # Underscore/space variant
-        alt = title_guess.replace('_', ' ') if '_' in title_guess else title_guess.replace(' ', '_')
-        u = article_title_to_filename.get(alt) or lower_title_to_url.get(alt.lower())
-        return u
-
-    def rewrite_article_links(body_html: str, asset_prefix: str) -> str:
-        s = BeautifulSoup(body_html, "html.parser")
-        for a in s.find_all('a'):
-            href = a.get('href')
-            if not href:
-                continue
-            if href.startswith('http://') or href.startswith('https://') or href.startswith('mailto:'):
-                continue
-            # category links
-            title_attr = a.get('title') or ''
-            if title_attr.startswith('Category:') or href.startswith('Category_'):
-                cat_name = normalize_category_name(title_attr) if title_attr else normalize_category_name(href.replace('Category_', '').replace('.html', '').replace('_', ' '))
-                a['href'] = f"{asset_prefix}categories/{category_output_filename(cat_name)}"
-                continue
-            # article links
-            guess_title = title_attr if title_attr and not title_attr.startswith('Category:') else href.replace('.html', '').replace('_', ' ')
-            url = resolve_article_url_by_title_maybe(guess_title)
-            if url:
-                a['href'] = f"{asset_prefix}{url}"
-        return str(s)
-    for title, filename in article_title_to_filename.items():
-        cats = sorted(article_title_to_categories.get(title, []), key=lambda s: s.lower())
+    def resolve_article_links(body_html: str, asset_prefix: str) -> str:
+        def fill(m: re.Match[str]) -> str:
+            if m.group(1) is None:
+                return asset_prefix
+            url = resolve_page_url(unquote(m.group(1)))
+            return f"{asset_prefix}{url}" if url else escape(unquote(m.group(2)))
+        return LINK_PLACEHOLDER_RE.sub(fill, body_html)
+
+    for title, (page_path, article_html, asset_prefix) in pending_pages.items():
+        cats = sorted(article_title_to_categories.get(title, []), key=str.lower)
+        crumbs_html = ""
         if cats:
             crumbs = ["<div class=\"breadcrumbs\">Categories:"]
             parts = []
             for c in cats[:5]:  # cap to avoid very long lines
-                parts.append(f"<a href=\"categories/{category_output_filename(c)}\">{c}</a>")
+                parts.append(f"<a href=\"{asset_prefix}categories/{category_output_filename(c)}\">{c}</a>")
             crumbs.append(" <span class=\"sep\">|</span> ".join(parts))
             crumbs.append("</div>")
-            # Re-read the body that was written earlier and rewrite page with breadcrumbs
-            page_path = SITE_DIR / Path(filename)
-            # Retrieve original body by re-parsing the built page body section would be complex; instead, reconstruct from source again
-            # Find original source soup by searching both src dirs
-            source_html = None
-            for base in SRC_DIRS:
-                src_guess1 = base / (title + ".html")
-                if src_guess1.exists():
-                    source_html = src_guess1.read_text(encoding="utf-8", errors="ignore")
-                    break
-            if source_html:
-                soup = BeautifulSoup(source_html, "html.parser")
-                article = extract_article(soup)
-                if article:
-                    # compute asset prefix for nested pages
-                    depth = len(page_path.relative_to(SITE_DIR).parts) - 1
-                    asset_prefix = "../" * depth
-                    body = rewrite_article_links(article["html"], asset_prefix)  # type: ignore[index]
-                    write_page(page_path, title, body, asset_prefix=asset_prefix, breadcrumbs_html="".join(crumbs))
+            crumbs_html = "".join(crumbs)
+        body = resolve_article_links(article_html, asset_prefix)
+        write_page(page_path, title, body, asset_prefix=asset_prefix, breadcrumbs_html=crumbs_html)
 
     # Home page (for site/)
     home_html = """